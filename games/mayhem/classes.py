@@ -1,6 +1,11 @@
 import pygame
 from config import *
+from collision import *
+from hud import *
+from telemetry import *
+from controllers import *
 import math
+import os
 
 
 class Launch:
@@ -9,15 +14,26 @@ class Launch:
     """
 
 
-    def main():
+    def main(rotation_steps=rotation_steps, mask_collisions=False, dirty_rects=False,
+             telemetry=None, frame_graph=False, controllers=None):
         """main method to start the game
         initializes pygame, sets up game window creats game objects,
         creates the sprite groups, adds,draws and updates them 
         runs the game loop.
 
-        closes the game"""
+        closes the game
+
+        Args:
+            rotation_steps: number of pre-rendered ship angles
+            mask_collisions: test pixel masks, not just rects, for collisions
+            dirty_rects: only redraw and update the parts of the screen that
+                         changed instead of flipping the whole display
+            telemetry: FrameTelemetry to record frame timings into, or None
+            frame_graph: draw the recorded frame times on screen
+            controllers: one controller per player, None to use the keyboard"""
 
         pygame.init()
+        Spaceship.rotation_steps = rotation_steps
 
         screen = pygame.display.set_mode((screen_width, screen_height))
         pygame.display.set_caption("Space Battle")
@@ -26,64 +42,209 @@ class Launch:
         running = True
 
 
-        obstacles= pygame.sprite.Group()
-        fuel_barrels= pygame.sprite.Group()
-        player_sprites = pygame.sprite.Group()
-        bullet_group = pygame.sprite.Group()
-
-
+        arena = Arena(controllers, mask_collisions)
+        player1, player2 = arena.player1, arena.player2
+        
+        font = pygame.font.Font(None, 36)  
 
-        player1 = Player((100, 350), player1_controls)
-        player2 = Player((600, 300), player2_controls)
+        # Scores and fuel counters for player 1 and 2
+        score_p1 = HudLabel(font, "Player 1 Score: {}", ("blue"), topleft=(10, 10))
+        fuel_text_p1 = HudLabel(font, "Player 1 Fuel: {}", ("blue"), topleft=(10, 50))
+        score_p2 = HudLabel(font, "Player 2 Score: {}", ("red"), topright=(screen_width - 10, 10))
+        fuel_text_p2 = HudLabel(font, "Player 2 Fuel: {}", ("red"), topright=(screen_width - 10, 50))
+        hud = Hud([score_p1, fuel_text_p1, score_p2, fuel_text_p2])
 
+        sprite_groups = arena.sprite_groups
 
-        obstacles.add(Obstacle((400,200), (50,150),("gray")))
-        fuel_barrels.add(Fuelbarrel((200,250)))
-        fuel_barrels.add(Fuelbarrel((500,250)))
-        player_sprites.add(player1)
-        player_sprites.add(player2)
+        background = pygame.Surface(screen.get_size())
+        background.fill(("white"))
+        screen.blit(background, (0, 0))
+        pygame.display.flip()
 
-        
-        font = pygame.font.Font(None, 36)  
+        graph = None
+        if telemetry and frame_graph:
+            graph = FrameGraph(telemetry, (10, screen_height - 110, 240, 100))
 
         while running:
+            if telemetry:
+                telemetry.begin_frame()
+
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     running = False
+            if telemetry:
+                telemetry.mark("input")
+
+            # Update player and bullet sprites, then resolve collisions
+            arena.update()
+            if telemetry:
+                telemetry.mark("update")
+            arena.collide()
+            if telemetry:
+                telemetry.mark("collision")
+
+            # Labels are only rendered again when the values change
+            score_p1.set(player1.score)
+            fuel_text_p1.set(player1.fuel)
+            score_p2.set(player2.score)
+            fuel_text_p2.set(player2.fuel)
+
+            if dirty_rects:
+                # Erase sprites and changed labels where they were last frame,
+                # draw them again and update only those parts of the display
+                for group in sprite_groups:
+                    group.clear(screen, background)
+                dirty = hud.clear(screen, background)
+                for group in sprite_groups:
+                    dirty += group.draw(screen)
+                dirty += hud.draw_dirty(screen, dirty)
+                if graph:
+                    dirty.append(graph.draw(screen))
+                if telemetry:
+                    telemetry.mark("draw")
+                pygame.display.update(dirty)
+            else:
+                screen.blit(background, (0, 0))
+                for group in sprite_groups:
+                    group.draw(screen)
+                hud.draw(screen)
+                if graph:
+                    graph.draw(screen)
+                if telemetry:
+                    telemetry.mark("draw")
+                pygame.display.flip()
+            if telemetry:
+                telemetry.mark("flip")
+                telemetry.end_frame()
+
+            clock.tick(60)  # 60 FPS
 
-            screen.fill(("white"))
+        if telemetry:
+            telemetry.close()
+        pygame.quit()
 
-            # Update player and bullet sprites
-            player_sprites.update(bullet_group, player_sprites, fuel_barrels,obstacles)
-            bullet_group.update()
 
-            # Draw player and bullet sprites
-            player_sprites.draw(screen)
-            bullet_group.draw(screen)
-            fuel_barrels.draw(screen)
-            obstacles.draw(screen)
 
-            # Render and blits the scores and fuel counter for player 1 and 2
-            score_p1 = font.render(f"Player 1 Score: {player1.score}", True, ("blue"))
-            screen.blit(score_p1, (10, 10))
 
-            fuel_text_p1 = font.render(f"Player 1 Fuel: {player1.fuel}", True, ("blue"))
-            screen.blit(fuel_text_p1, (10, 50))
+class Arena:
+    """The game world without any window: the sprites, their groups and
+    the collision system
 
-            score_p2 = font.render(f"Player 2 Score: {player2.score}", True, ("red"))
-            screen.blit(score_p2, (screen_width - score_p2.get_width() - 10, 10))
+    step() advances the game by one fixed tick, so the same world runs in
+    the game window or headless as fast as possible.
+    """
+
+    def __init__(self, controllers=None, mask_collisions=False):
+        """
+        Initialize
 
-            fuel_text_p2 = font.render(f"Player 2 Fuel: {player2.fuel}", True, ("red"))
-            screen.blit(fuel_text_p2, (screen_width - fuel_text_p2.get_width() - 10, 50))
+        Args:
+            controllers: one controller per player, None to use the keyboard
+            mask_collisions: test pixel masks, not just rects, for collisions
+        """
+        if controllers is None:
+            controllers = [KeyboardController(player1_controls), KeyboardController(player2_controls)]
 
-            pygame.display.flip()
-            clock.tick(60)  # 60 FPS
+        self.obstacles= pygame.sprite.RenderUpdates()
+        self.fuel_barrels= pygame.sprite.RenderUpdates()
+        self.player_sprites = pygame.sprite.RenderUpdates()
+        self.bullet_group = pygame.sprite.RenderUpdates()
 
-        pygame.quit()
+        self.player1 = Player((100, 350), player1_controls, controllers[0])
+        self.player2 = Player((600, 300), player2_controls, controllers[1])
+
+        self.obstacles.add(Obstacle((400,200), (50,150),("gray")))
+        self.fuel_barrels.add(Fuelbarrel((200,250)))
+        self.fuel_barrels.add(Fuelbarrel((500,250)))
+        self.player_sprites.add(self.player1)
+        self.player_sprites.add(self.player2)
+
+        self.collisions = CollisionSystem(use_masks=mask_collisions)
+        self.collisions.register("player", self.player_sprites)
+        self.collisions.register("bullet", self.bullet_group)
+        self.collisions.register("fuel", self.fuel_barrels)
+        self.collisions.register("obstacle", self.obstacles)
+
+        self.sprite_groups = [self.player_sprites, self.bullet_group, self.fuel_barrels, self.obstacles]
+
+    def update(self):
+        """moves the players and bullets"""
+        self.player_sprites.update(self.bullet_group)
+        self.bullet_group.update()
+
+    def collide(self):
+        """resolves this tick's collisions"""
+        self.collisions.update()
+
+    def step(self):
+        """advances the game by one tick"""
+        self.update()
+        self.collide()
+
+    def scores(self):
+        """returns the scores of player 1 and 2"""
+        return self.player1.score, self.player2.score
+
+
+
+
+image_cache = {}
+
+def load_image(filename, size):
+    """loads an image next to this file scaled to size, once
+
+    The image is only converted to the display format when a display is
+    open, so sprites can be created headless."""
+
+    key = (filename, size)
+    if key not in image_cache:
+        image = pygame.image.load(os.path.join(os.path.dirname(os.path.abspath(__file__)), filename))
+        if pygame.display.get_surface():
+            image = image.convert_alpha()
+        image_cache[key] = pygame.transform.scale(image, size)
+    return image_cache[key]
+
+
+
+
+class RotationCache:
+    """Pre-rendered rotations of a sprite image
 
+    The image is rotated once per quantized angle at load time, so rotating
+    a sprite at runtime is a table lookup instead of a transform.
+    """
+
+    caches = {}
+
+    def __init__(self, image, steps):
+        """
+        Initialize
 
+        Args:
+            image: surface to rotate
+            steps: number of quantized angles in a full turn, more steps
+                   give smoother rotation at the cost of memory
+        """
+        self.steps = steps
+        self.frames = []
+        for step in range(steps):
+            rotated = pygame.transform.rotate(image, step * 360 / steps)
+            self.frames.append((rotated, pygame.mask.from_surface(rotated), rotated.get_rect()))
+
+    @classmethod
+    def load(cls, filename, size, steps):
+        """returns the shared cache for an image file scaled to size,
+        rendering it the first time it is asked for"""
 
+        key = (filename, size, steps)
+        if key not in cls.caches:
+            cls.caches[key] = cls(load_image(filename, size), steps)
+        return cls.caches[key]
 
+    def lookup(self, angle):
+        """returns (image, mask, rect) for the step closest to angle in degrees"""
+
+        return self.frames[round(angle * self.steps / 360) % self.steps]
 
 
 
@@ -92,6 +253,8 @@ class Spaceship(pygame.sprite.Sprite):
     """parent class that inherits from sprite
     """
 
+    rotation_steps = rotation_steps
+
 
     def __init__(self, position, angle=0):
         """
@@ -102,12 +265,10 @@ class Spaceship(pygame.sprite.Sprite):
             angle: Initial angle of the spaceship
         """
         super().__init__()
-        self.original_image = pygame.image.load("spaceship2.png").convert_alpha()
-        self.scaled_image = pygame.transform.scale(self.original_image, (70,70))
-        self.image= self.scaled_image
-        self.rect = self.image.get_rect()
+        self.rotations = RotationCache.load("spaceship2.png", (70,70), Spaceship.rotation_steps)
         self.position = pygame.math.Vector2(position)
         self.angle = angle
+        self.apply_rotation()
         self.score=0
         self.angular_speed=0
         self.thrust_power=0.1
@@ -121,8 +282,15 @@ class Spaceship(pygame.sprite.Sprite):
         
         self.angular_speed += delta_angle
         self.angle += self.angular_speed
-        self.image = pygame.transform.rotate(self.scaled_image, self.angle-90)
-        self.rect = self.image.get_rect(center=self.rect.center)
+        self.apply_rotation()
+
+    def apply_rotation(self):
+        """Looks up the pre-rendered image, mask and rect for the current angle,
+        centred on the ship's position."""
+
+        self.image, self.mask, rect = self.rotations.lookup(self.angle-90)
+        self.rect = rect.copy()
+        self.rect.center = self.position
 
     def move_forward(self, thrust_power):
         """Moves the ship forward with the specified thrust power."""
@@ -143,19 +311,22 @@ class Player(Spaceship):
     """Class representing a player spaceship inherits from Spaceship
     """
 
-    def __init__(self, position, controls):
+    def __init__(self, position, controls, controller=None):
         """
         Initialize 
 
         Args:
             position: Initial position of the player ship as (x, y) tuple
             controls: Dictionary containing control mappings for the player
+            controller: decides the player's actions each frame,
+                        None reads the keys in controls
         """
 
         super().__init__(position)
         self.cooldown = 0
         self.last_shot = 30
         self.controls = controls
+        self.controller = controller if controller is not None else KeyboardController(controls)
         self.fuel = 300 
         self.respawn_point= position
 
@@ -181,9 +352,29 @@ class Player(Spaceship):
             self.fuel=300
 
 
-    def update(self, bullet_group, player_sprites, fuel_barrels, obstacles):
-        """update method to handle logic such as collision movement and gravity
-        and shooting cooldown"""
+    def on_collision(self, event, other):
+        """handles a collision event from the collision system
+
+        Args:
+            event: HIT, REFUEL or CRASH
+            other: the sprite collided with"""
+
+        if event == HIT:
+            # respawns if hit by a bullet and gives the shooter a point
+            self.respawn()
+            self.fuel = 300
+            other.kill()
+            other.owner.score +=1
+        elif event == REFUEL:
+            self.fuel=300
+            other.kill()
+        elif event == CRASH:
+            self.respawn()
+
+
+    def update(self, bullet_group):
+        """update method to handle logic such as movement and gravity
+        and shooting cooldown, collisions are handled in on_collision"""
         self.cooldown += 1
         self.Boundary_Check(screen_width, screen_height)
         self.position.y += gravity
@@ -193,62 +384,23 @@ class Player(Spaceship):
             if abs(self.angular_speed)<0.2:
                 self.angular_speed=0
         self.angle += self.angular_speed
-        self.image = pygame.transform.rotate(self.image, self.angular_speed)  # Rotate the ship
-        
-
-
-        
-
-
-
-        # Check for collisions with bullets add point if target hit
-        self.bullet_collisions = pygame.sprite.spritecollide(self, bullet_group, False)
-        for bullet in self.bullet_collisions:
-            if bullet.owner != self:
-                self.respawn()  
-                self.fuel = 300
-                bullet.kill()
-                bullet_owner= bullet.owner
-                bullet_owner.score +=1
-            
-
-        #Check for collisions with spaceships respawns if hit
-        self.enemy_collisions= pygame.sprite.spritecollide(self, player_sprites, False)
-        for enemy in self.enemy_collisions:
-            if enemy != self:
-                self.respawn()
-
-        #Check for collision with fuel barrels refuels if hit
-        self.fuel_collisions= pygame.sprite.spritecollide(self,fuel_barrels,True)
-        for fuel_barrels in self.fuel_collisions:
-            self.fuel=300
-
-        # Collisions with obstacle
-        self.obstacle_collisions = pygame.sprite.spritecollide(self, obstacles, False)
-        for obstacles in self.obstacle_collisions:
-            self.respawn()
-
-
-        #collisions between bullet and obstacle removes the bullet upon hit
-        self.bullet_obstacle_collisions= pygame.sprite.groupcollide(bullet_group,obstacles,True,False)
-        for bullet in self.bullet_obstacle_collisions:
-            bullet.kill()
+        self.apply_rotation()  # Rotate the ship
         
         
+        actions = self.controller.poll(self)
         if self.fuel > 0:
-            keys = pygame.key.get_pressed()
-            if keys[self.controls["left"]]:
+            if actions.left:
                 self.rotate(-0.05)
-            if keys[self.controls["right"]]:
+            if actions.right:
                 self.rotate(0.05)
             if self.cooldown >= self.last_shot:
-                if keys[self.controls["shoot"]]:
+                if actions.shoot:
                     bullet_direction = self.controls["direction"]
                     bullet_pos = self.rect.centerx, self.rect.centery
                     bullet = Bullet(*bullet_pos, bullet_direction, self)
                     bullet_group.add(bullet)
                     self.cooldown = 0
-            if keys[self.controls["forward"]]:
+            if actions.forward:
                 self.move_forward(0.1)
                 self.fuel -= 1 
                 self.position.y -= gravity
@@ -265,6 +417,8 @@ class Player(Spaceship):
 class Bullet(pygame.sprite.Sprite):
     """Bullet projectile class"""
 
+    shared_mask = None
+
     def __init__(self, x, y, direction, owner):
         """
         Initialize the program
@@ -277,9 +431,10 @@ class Bullet(pygame.sprite.Sprite):
         """
 
         super().__init__()
-        self.original_image = pygame.image.load("bullet2.png").convert_alpha()
-        self.scaled_image = pygame.transform.scale(self.original_image, (40, 40))
-        self.image = self.scaled_image
+        self.image = load_image("bullet2.png", (40, 40))
+        if Bullet.shared_mask is None:
+            Bullet.shared_mask = pygame.mask.from_surface(self.image)
+        self.mask = Bullet.shared_mask
         self.rect = self.image.get_rect()
         self.rect.center = [x, y]
         self.direction=direction
@@ -293,6 +448,10 @@ class Bullet(pygame.sprite.Sprite):
         else:
             self.rect.x -=5
 
+        # nothing can be hit off screen, so stop tracking the bullet
+        if self.rect.right < 0 or self.rect.left > screen_width:
+            self.kill()
+
     
 
 
@@ -0,0 +1,160 @@
+"""file containing the collision system, one broadphase pass per frame
+that hands typed collision events back to the players
+"""
+import unittest
+import pygame
+from config import *
+
+
+# Collision events sent to Player.on_collision
+HIT = "hit"          # player was hit by another player's bullet
+REFUEL = "refuel"    # player touched a fuel barrel
+CRASH = "crash"      # player touched another player or an obstacle
+
+
+class CollisionSystem:
+    """Finds all colliding sprite pairs once per frame
+
+    Sprite groups are registered under a kind ("player", "bullet", "fuel" or
+    "obstacle"). Every frame the sprites are bucketed into a uniform grid,
+    only sprites sharing a cell are tested, and each pair is tested once.
+    """
+
+    # (kind, kind) pairs that are tested, and the method handling a collision
+    rules = {
+        ("player", "bullet"): "player_bullet",
+        ("player", "player"): "player_player",
+        ("player", "fuel"): "player_fuel",
+        ("player", "obstacle"): "player_obstacle",
+        ("bullet", "obstacle"): "bullet_obstacle",
+    }
+
+    def __init__(self, cell_size=collision_cell_size, use_masks=False):
+        """
+        Initialize
+
+        Args:
+            cell_size: width and height of a grid cell in pixels
+            use_masks: test pixel masks after the rects overlap
+        """
+        self.cell_size = cell_size
+        self.use_masks = use_masks
+        self.groups = []
+
+    def register(self, kind, group):
+        """registers a sprite group, sprites added to or killed from the
+        group later are picked up automatically"""
+
+        self.groups.append((kind, group))
+
+    def cells(self, rect):
+        """yields the grid cells covered by rect"""
+
+        size = self.cell_size
+        for x in range(rect.left // size, (rect.right - 1) // size + 1):
+            for y in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                yield x, y
+
+    def pairs(self):
+        """returns every (kind, sprite, kind, sprite) pair whose kinds have a
+        rule and whose rects (and masks) overlap, each pair only once"""
+
+        grid = {}
+        for kind, group in self.groups:
+            for sprite in group:
+                for cell in self.cells(sprite.rect):
+                    grid.setdefault(cell, []).append((kind, sprite))
+
+        tested = set()
+        found = []
+        for entries in grid.values():
+            for i, first in enumerate(entries):
+                for second in entries[i + 1:]:
+                    if (first[0], second[0]) in self.rules:
+                        (kind_a, a), (kind_b, b) = first, second
+                    elif (second[0], first[0]) in self.rules:
+                        (kind_a, a), (kind_b, b) = second, first
+                    else:
+                        continue
+                    key = (id(a), id(b))
+                    if key in tested:
+                        continue
+                    tested.add(key)
+                    if self.overlap(a, b):
+                        found.append((kind_a, a, kind_b, b))
+        return found
+
+    def overlap(self, a, b):
+        """returns True if the rects (and masks) of a and b overlap"""
+
+        if not a.rect.colliderect(b.rect):
+            return False
+        return not self.use_masks or bool(pygame.sprite.collide_mask(a, b))
+
+    def update(self):
+        """runs the collision phase for this frame"""
+
+        for kind_a, a, kind_b, b in self.pairs():
+            # an earlier event this frame may already have removed the sprite
+            # or respawned the player somewhere else, so test the pair again
+            if a.alive() and b.alive() and self.overlap(a, b):
+                getattr(self, self.rules[(kind_a, kind_b)])(a, b)
+
+    def player_bullet(self, player, bullet):
+        if bullet.owner != player:
+            player.on_collision(HIT, bullet)
+
+    def player_player(self, player, other):
+        player.on_collision(CRASH, other)
+        other.on_collision(CRASH, player)
+
+    def player_fuel(self, player, barrel):
+        player.on_collision(REFUEL, barrel)
+
+    def player_obstacle(self, player, obstacle):
+        player.on_collision(CRASH, obstacle)
+
+    def bullet_obstacle(self, bullet, obstacle):
+        bullet.kill()
+
+
+class TestCollisionSystem(unittest.TestCase):
+    """dispatch rules, run headless with: python -m unittest collision"""
+
+    def setUp(self):
+        from classes import Arena, Bullet, ScriptedController
+        self.Bullet = Bullet
+        self.arena = Arena([ScriptedController(["-"]), ScriptedController(["-"])])
+        self.player1, self.player2 = self.arena.player1, self.arena.player2
+
+    def place(self, player, position):
+        player.position = pygame.math.Vector2(position)
+        player.rect.center = position
+
+    def test_one_event_per_pair(self):
+        self.place(self.player1, (100, 100))
+        bullet = self.Bullet(100, 100, 1, self.player2)
+        self.arena.bullet_group.add(bullet)
+        self.arena.collide()
+        self.assertEqual(self.arena.scores(), (-1, 1))
+        self.assertFalse(bullet.alive())
+
+    def test_no_double_penalty_after_respawn(self):
+        obstacle = next(iter(self.arena.obstacles))
+        self.place(self.player1, obstacle.rect.center)
+        self.arena.bullet_group.add(self.Bullet(*obstacle.rect.center, 1, self.player2))
+        self.arena.collide()
+        self.assertEqual(self.player1.score, -1)
+        self.assertEqual(self.player1.rect.center, tuple(map(int, self.player1.respawn_point)))
+
+    def test_barrel_taken_by_one_player(self):
+        barrel = next(iter(self.arena.fuel_barrels))
+        # both ships overlap the barrel from either side, but not each other
+        for player, x in ((self.player1, barrel.rect.left - 30), (self.player2, barrel.rect.right + 30)):
+            player.fuel = 0
+            self.place(player, (x, barrel.rect.centery))
+        self.assertFalse(self.player1.rect.colliderect(self.player2.rect))
+        self.arena.collide()
+        self.assertFalse(barrel.alive())
+        self.assertEqual(sorted(player.fuel for player in (self.player1, self.player2)), [0, 300])
+
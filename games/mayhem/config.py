@@ -5,12 +5,17 @@
 import pygame
 screen_width= 800
 screen_height= 600
-screen = pygame.display.set_mode([screen_width, screen_height])
 
 
 
 gravity= 1
 
+# Number of pre-rendered angles for rotating ships, lower saves memory
+rotation_steps= 360
+
+# Size in pixels of a cell in the collision grid
+collision_cell_size= 100
+
 
 
 
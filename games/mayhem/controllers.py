@@ -0,0 +1,153 @@
+"""file containing the controllers that decide what a player does each frame,
+from the keyboard, a script, a random generator or a replay file
+"""
+import random
+from collections import namedtuple
+import pygame
+
+
+# What a player does in one frame
+Actions = namedtuple("Actions", ["left", "right", "forward", "shoot"])
+
+IDLE = Actions(False, False, False, False)
+
+# Letters used for the actions in scripts and replay files, "-" is no action
+LETTERS = Actions("L", "R", "F", "S")
+
+
+def parse_actions(text):
+    """turns a string of action letters such as "FL" into Actions"""
+    return Actions(*(letter in text for letter in LETTERS))
+
+
+def format_actions(actions):
+    """turns Actions into a string of action letters, "-" if idle"""
+    return "".join(letter for letter, on in zip(LETTERS, actions) if on) or "-"
+
+
+class KeyboardController:
+    """reads the keys given in a player's controls dictionary"""
+
+    def __init__(self, controls):
+        """
+        Initialize
+
+        Args:
+            controls: dictionary with the "left", "right", "forward" and "shoot" keys
+        """
+        self.controls = controls
+
+    def poll(self, player):
+        """returns the Actions for this frame"""
+        keys = pygame.key.get_pressed()
+        return Actions(keys[self.controls["left"]], keys[self.controls["right"]],
+                       keys[self.controls["forward"]], keys[self.controls["shoot"]])
+
+
+class ScriptedController:
+    """plays a fixed list of actions, one entry per frame, over and over"""
+
+    def __init__(self, script):
+        """
+        Initialize
+
+        Args:
+            script: list of action strings such as ["F", "FL", "-", "S"]
+        """
+        self.script = [parse_actions(step) for step in script]
+        self.frame = 0
+
+    def poll(self, player):
+        """returns the Actions for this frame"""
+        actions = self.script[self.frame % len(self.script)]
+        self.frame += 1
+        return actions
+
+
+class RandomController:
+    """presses every action at random, from its own seeded generator"""
+
+    def __init__(self, seed, probability=0.3):
+        """
+        Initialize
+
+        Args:
+            seed: seed for the generator, the same seed gives the same game
+            probability: chance that an action is pressed in a frame
+        """
+        self.random = random.Random(seed)
+        self.probability = probability
+
+    def poll(self, player):
+        """returns the Actions for this frame"""
+        return Actions(*(self.random.random() < self.probability for _ in LETTERS))
+
+
+class ReplayController:
+    """plays one player's column of a replay file, idle once it runs out
+
+    A replay file has one line per frame with one action string per player,
+    separated by spaces, e.g. "FL -"."""
+
+    def __init__(self, filename, player_index):
+        """
+        Initialize
+
+        Args:
+            filename: replay file to read
+            player_index: which column of the file to play
+        """
+        with open(filename) as file:
+            self.frames = [parse_actions(line.split()[player_index]) for line in file if line.strip()]
+        self.frame = 0
+
+    def poll(self, player):
+        """returns the Actions for this frame"""
+        actions = self.frames[self.frame] if self.frame < len(self.frames) else IDLE
+        self.frame += 1
+        return actions
+
+
+class ReplayRecorder:
+    """wraps the controllers of all players and writes what they do to a replay file"""
+
+    def __init__(self, filename, controllers):
+        """
+        Initialize
+
+        Args:
+            filename: replay file to write
+            controllers: controllers of the players, in column order
+        """
+        self.file = open(filename, "w")
+        self.controllers = controllers
+        self.current = [IDLE] * len(controllers)
+        self.polled = 0
+
+    def controller(self, player_index):
+        """returns a controller for the player that records its actions"""
+        return RecordedController(self, player_index)
+
+    def record(self, player_index, actions):
+        self.current[player_index] = actions
+        self.polled += 1
+        if self.polled == len(self.controllers):
+            self.file.write(" ".join(format_actions(a) for a in self.current) + "\n")
+            self.polled = 0
+
+    def close(self):
+        self.file.close()
+
+
+class RecordedController:
+    """controller handed out by ReplayRecorder"""
+
+    def __init__(self, recorder, player_index):
+        self.recorder = recorder
+        self.player_index = player_index
+
+    def poll(self, player):
+        """returns the wrapped controller's Actions for this frame and records them"""
+        actions = self.recorder.controllers[self.player_index].poll(player)
+        self.recorder.record(self.player_index, actions)
+        return actions
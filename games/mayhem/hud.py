@@ -0,0 +1,85 @@
+"""file containing the HUD, text labels that are only re-rendered
+when the value they show changes
+"""
+import pygame
+
+
+class HudLabel:
+    """a line of text showing a single value"""
+
+    def __init__(self, font, text, color, **position):
+        """
+        Initialize
+
+        Args:
+            font: pygame font to render with
+            text: format string the value is put into, e.g. "Fuel: {}"
+            color: text color
+            position: where to place the text, as a rect keyword such as
+                      topleft=(10, 10) or topright=(790, 10)
+        """
+        self.font = font
+        self.text = text
+        self.color = color
+        self.position = position
+        self.value = None
+        self.image = None
+        self.rect = pygame.Rect(0, 0, 0, 0)
+        self.old_rect = None
+
+    def set(self, value):
+        """sets the value, renders the text again only if it changed"""
+
+        if self.image is not None and value == self.value:
+            return
+        if self.old_rect is None:
+            self.old_rect = self.rect
+        self.value = value
+        self.image = self.font.render(self.text.format(value), True, self.color)
+        self.rect = self.image.get_rect(**self.position)
+
+
+class Hud:
+    """group of labels drawn on top of the sprites"""
+
+    def __init__(self, labels):
+        """
+        Initialize
+
+        Args:
+            labels: list of HudLabel
+        """
+        self.labels = labels
+
+    def draw(self, screen):
+        """blits every label"""
+
+        for label in self.labels:
+            screen.blit(label.image, label.rect)
+            label.old_rect = None
+
+    def clear(self, screen, background):
+        """erases labels whose text changed since the last draw,
+        returns the rects that were erased"""
+
+        cleared = []
+        for label in self.labels:
+            if label.old_rect is not None:
+                screen.blit(background, label.old_rect, label.old_rect)
+                cleared.append(label.old_rect)
+        return cleared
+
+    def draw_dirty(self, screen, dirty):
+        """blits the labels that changed or that sprites drew over,
+        returns the rects that were blitted
+
+        Args:
+            dirty: rects changed on screen so far this frame"""
+
+        drawn = []
+        for label in self.labels:
+            if label.old_rect is not None or label.rect.collidelist(dirty) != -1:
+                screen.blit(label.image, label.rect)
+                label.old_rect = None
+                drawn.append(label.rect)
+        return drawn
@@ -1,12 +1,51 @@
 
 from config import *
 from classes import *
-import cProfile
+import argparse
 
 
 """launches  the game as per requirements"""
 
 
+def frame_window(text):
+    """parses FIRST:LAST into a (first, last) tuple of frame numbers"""
+    first, last = text.split(":")
+    return int(first), int(last)
+
 
 if __name__ == "__main__":
-    cProfile.run("Launch.main()")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Space Battle")
+    parser.add_argument("--rotation-steps", type=int, default=rotation_steps,
+                        help="number of pre-rendered ship angles (default %(default)s)")
+    parser.add_argument("--mask-collisions", action="store_true",
+                        help="use pixel masks instead of rects for collisions")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="only update the parts of the screen that changed")
+    parser.add_argument("--telemetry", action="store_true",
+                        help="record per-phase frame times and print percentiles on exit")
+    parser.add_argument("--frame-graph", action="store_true",
+                        help="draw recorded frame times on screen, implies --telemetry")
+    parser.add_argument("--profile-frames", type=frame_window, metavar="FIRST:LAST",
+                        help="run cProfile only from frame FIRST to frame LAST")
+    parser.add_argument("--profile-out", default="mayhem.prof",
+                        help="file the profile is written to (default %(default)s)")
+    parser.add_argument("--replay", help="play a replay file instead of reading the keyboard")
+    parser.add_argument("--record", help="write what both players do to a replay file")
+    args = parser.parse_args()
+
+    controllers = None
+    if args.replay:
+        controllers = [ReplayController(args.replay, 0), ReplayController(args.replay, 1)]
+    recorder = None
+    if args.record:
+        recorder = ReplayRecorder(args.record, controllers or
+                                  [KeyboardController(player1_controls), KeyboardController(player2_controls)])
+        controllers = [recorder.controller(0), recorder.controller(1)]
+
+    telemetry = None
+    if args.telemetry or args.frame_graph or args.profile_frames:
+        telemetry = FrameTelemetry(profile_frames=args.profile_frames, profile_file=args.profile_out)
+    Launch.main(args.rotation_steps, args.mask_collisions, args.dirty_rects,
+                telemetry, args.frame_graph, controllers)
+    if recorder:
+        recorder.close()
\ No newline at end of file
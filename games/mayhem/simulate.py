@@ -0,0 +1,83 @@
+"""runs matches headless, without a window and without a frame cap,
+to tune the physics constants and benchmark the update path
+
+example: python simulate.py --matches 2000 --frames 3600 --controller random
+"""
+import argparse
+import multiprocessing
+import time
+from config import *
+from classes import *
+
+
+# Default scripts for the scripted controllers, one action string per frame
+SCRIPTS = (
+    ["F"] * 20 + ["FL"] * 6 + ["S"] + ["-"] * 12 + ["FR"] * 6 + ["S"],
+    ["F"] * 15 + ["FR"] * 4 + ["S"] + ["-"] * 20 + ["FL"] * 4 + ["S"],
+)
+
+
+def make_controllers(controller, seed, replay=None):
+    """returns the controllers of both players for one match"""
+
+    if controller == "random":
+        return [RandomController(2 * seed), RandomController(2 * seed + 1)]
+    if controller == "scripted":
+        return [ScriptedController(SCRIPTS[0]), ScriptedController(SCRIPTS[1])]
+    return [ReplayController(replay, 0), ReplayController(replay, 1)]
+
+
+def run_match(match):
+    """plays one match and returns (seed, (score player 1, score player 2))
+
+    Args:
+        match: (seed, frames, controller, replay, rotation_steps, mask_collisions)
+    """
+    seed, frames, controller, replay, steps, mask_collisions = match
+    Spaceship.rotation_steps = steps
+    arena = Arena(make_controllers(controller, seed, replay), mask_collisions)
+    for _ in range(frames):
+        arena.step()
+    return seed, arena.scores()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless Space Battle matches")
+    parser.add_argument("--matches", type=int, default=100, help="number of matches (default %(default)s)")
+    parser.add_argument("--frames", type=int, default=3600, help="ticks per match (default %(default)s)")
+    parser.add_argument("--controller", choices=["random", "scripted", "replay"], default="random",
+                        help="what drives the players (default %(default)s)")
+    parser.add_argument("--replay", help="replay file for --controller replay")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first match, each match adds one")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="worker processes, 0 runs in this process (default: one per CPU)")
+    parser.add_argument("--rotation-steps", type=int, default=rotation_steps,
+                        help="number of pre-rendered ship angles (default %(default)s)")
+    parser.add_argument("--mask-collisions", action="store_true",
+                        help="use pixel masks instead of rects for collisions")
+    args = parser.parse_args()
+    if args.controller == "replay" and not args.replay:
+        parser.error("--controller replay needs --replay FILE")
+
+    matches = [(args.seed + i, args.frames, args.controller, args.replay, args.rotation_steps, args.mask_collisions)
+               for i in range(args.matches)]
+
+    start = time.perf_counter()
+    if args.processes == 0:
+        results = [run_match(match) for match in matches]
+    else:
+        with multiprocessing.Pool(args.processes) as pool:
+            results = list(pool.imap_unordered(run_match, matches, chunksize=max(1, args.matches // 64)))
+    elapsed = time.perf_counter() - start
+
+    results.sort()
+    wins1 = sum(1 for _, (score1, score2) in results if score1 > score2)
+    wins2 = sum(1 for _, (score1, score2) in results if score2 > score1)
+    print(f"{args.matches} matches of {args.frames} ticks in {elapsed:.2f} s")
+    print(f"{args.matches / elapsed:.1f} matches/sec, {args.matches * args.frames / elapsed:.0f} ticks/sec")
+    print(f"player 1 won {wins1}, player 2 won {wins2}, draws {args.matches - wins1 - wins2}")
+    print(f"total scores: {sum(r[1][0] for r in results)} / {sum(r[1][1] for r in results)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""file containing opt-in frame timing, the frame-time graph
+and profiling of a window of frames
+"""
+import cProfile
+import sys
+import time
+from array import array
+import pygame
+
+
+# Phases of a frame in the order they run
+PHASES = ("input", "update", "collision", "draw", "flip")
+
+# Colors of the phases in the frame-time graph
+PHASE_COLORS = {"input": ("orange"), "update": ("blue"), "collision": ("red"),
+                "draw": ("green"), "flip": ("purple")}
+
+
+class FrameTelemetry:
+    """Records how long each phase of the last frames took
+
+    Timings are kept in a ring buffer per phase, so memory use is fixed
+    no matter how long the game runs.
+    """
+
+    def __init__(self, capacity=600, profile_frames=None, profile_file="mayhem.prof"):
+        """
+        Initialize
+
+        Args:
+            capacity: number of frames kept in the ring buffer
+            profile_frames: (first, last) frame numbers to run cProfile for,
+                            or None to not profile
+            profile_file: file the profile stats are dumped to
+        """
+        self.capacity = capacity
+        self.samples = {phase: array("d", [0.0]) * capacity for phase in PHASES}
+        self.frame = 0
+        self.last = 0.0
+        self.profile_frames = profile_frames
+        self.profile_file = profile_file
+        self.profiler = None
+
+    def begin_frame(self):
+        """starts timing a frame, and the profiler if the window starts here"""
+
+        if self.profile_frames and self.frame == self.profile_frames[0]:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        self.last = time.perf_counter()
+
+    def mark(self, phase):
+        """records the time since the previous mark as the time spent in phase"""
+
+        now = time.perf_counter()
+        self.samples[phase][self.frame % self.capacity] = now - self.last
+        self.last = now
+
+    def end_frame(self):
+        """finishes the frame, and stops the profiler if the window ends here"""
+
+        if self.profiler and self.frame == self.profile_frames[1]:
+            self.stop_profiler()
+        self.frame += 1
+
+    def stop_profiler(self):
+        """stops the profiler and dumps its stats"""
+
+        self.profiler.disable()
+        self.profiler.dump_stats(self.profile_file)
+        self.profiler = None
+
+    def recorded(self, phase):
+        """returns the timings in the buffer for phase, oldest first"""
+
+        samples = self.samples[phase]
+        if self.frame <= self.capacity:
+            return samples[:self.frame]
+        start = self.frame % self.capacity
+        return samples[start:] + samples[:start]
+
+    def percentiles(self, phase, points=(50, 90, 99)):
+        """returns {percentile: seconds} for phase over the recorded frames"""
+
+        ordered = sorted(self.recorded(phase))
+        if not ordered:
+            return {point: 0.0 for point in points}
+        return {point: ordered[min(len(ordered) - 1, len(ordered) * point // 100)] for point in points}
+
+    def report(self, file=sys.stdout):
+        """writes per-phase percentiles in milliseconds"""
+
+        frames = min(self.frame, self.capacity)
+        print(f"Frame times over the last {frames} frames (ms)", file=file)
+        print(f"{'phase':<10}{'p50':>8}{'p90':>8}{'p99':>8}{'max':>8}", file=file)
+        for phase in PHASES:
+            p = self.percentiles(phase, (50, 90, 99, 100))
+            print(f"{phase:<10}" + "".join(f"{p[point] * 1000:>8.2f}" for point in (50, 90, 99, 100)), file=file)
+
+    def close(self, file=sys.stdout):
+        """stops a profiler still running and writes the report"""
+
+        if self.profiler:
+            self.stop_profiler()
+        self.report(file)
+
+
+class FrameGraph:
+    """On-screen graph of the last frame times, one stacked bar per frame"""
+
+    def __init__(self, telemetry, rect, budget=1 / 60):
+        """
+        Initialize
+
+        Args:
+            telemetry: FrameTelemetry to read from
+            rect: where on the screen to draw the graph
+            budget: frame time in seconds drawn as the full graph height
+        """
+        self.telemetry = telemetry
+        self.rect = pygame.Rect(rect)
+        self.budget = budget
+        self.surface = pygame.Surface(self.rect.size)
+
+    def draw(self, screen):
+        """draws the graph, returns the rect it covered"""
+
+        self.surface.fill(("black"))
+        height = self.rect.height
+        frame = self.telemetry.frame
+        for x in range(min(self.rect.width, frame, self.telemetry.capacity)):
+            index = (frame - 1 - x) % self.telemetry.capacity
+            bottom = height
+            for phase in PHASES:
+                bar = int(self.telemetry.samples[phase][index] / self.budget * height)
+                if bar:
+                    pygame.draw.line(self.surface, PHASE_COLORS[phase],
+                                     (self.rect.width - 1 - x, bottom - 1), (self.rect.width - 1 - x, bottom - bar))
+                    bottom -= bar
+        return screen.blit(self.surface, self.rect)